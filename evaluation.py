@@ -14,11 +14,21 @@ Evaluation Categories:
 """
 
 import asyncio
-import logging
+import os
+import tempfile
+import types as pytypes
+from dataclasses import asdict
 from typing import List, Dict, Any
 from datetime import datetime
-from .agent import health_coordinator
-from .storage import store
+import orjson
+from google.genai import types
+from ._logging import logger
+from google.adk.agents import LlmAgent
+from google.adk.tools import AgentTool
+from .agent import MODEL_NAME, health_coordinator
+from .agent_pool import AgentPool, pool_key
+from .batch import batch_responses, build_request, submit_batch, wait_for_batch
+from .storage import HealthStore, SymptomEntry, store
 from .tools import (
     log_symptom,
     track_medication,
@@ -26,9 +36,15 @@ from .tools import (
     get_health_summary,
 )
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+
+# Maximum number of tool calls in flight during evaluation
+MAX_CONCURRENCY = 8
+
+# Detailed per-test results (JSON Lines)
+RESULTS_PATH = "evaluation_results.jsonl"
+
+# Upper bound on waiting for the routing batch job
+BATCH_TIMEOUT_SECONDS = 30 * 60
 
 
 class AgentEvaluator:
@@ -47,32 +63,61 @@ class AgentEvaluator:
         self.total_tests = 0
         self.passed_tests = 0
     
-    def evaluate_tool_function(self, test_name: str, function: callable, 
-                                args: dict, expected_status: str) -> Dict[str, Any]:
+    async def evaluate_tool_function(self, test_name: str, function: callable, 
+                                      args: dict, expected_status: str) -> Dict[str, Any]:
         """
         Evaluate a single tool function call.
         
         Args:
             test_name: Name of the test case
-            function: Tool function to test
+            function: Async tool function to test
             args: Arguments to pass to function
             expected_status: Expected status in response ("success" or "error")
         
         Returns:
             Dictionary with test results
         """
+        test_result = await self._run_tool_test(test_name, function, args, expected_status)
+        self.record(test_result)
+        return test_result
+    
+    async def evaluate_tool_functions(self, test_cases: List[tuple],
+                                      max_concurrency: int = MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Evaluate independent tool calls concurrently.
+        
+        Args:
+            test_cases: (test_name, function, args, expected_status) tuples
+            max_concurrency: Upper bound on in-flight calls (rate limiting)
+        
+        Returns:
+            Test results, recorded in the order the cases were given
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_limited(case: tuple) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._run_tool_test(*case)
+        
+        test_results = await asyncio.gather(*[run_limited(case) for case in test_cases])
+        for test_result in test_results:
+            self.record(test_result)
+        return test_results
+    
+    async def _run_tool_test(self, test_name: str, function: callable,
+                             args: dict, expected_status: str) -> Dict[str, Any]:
+        """Call the tool and build the test result (without recording it)."""
         logger.info(f"Running test: {test_name}")
         
         try:
-            result = function(**args)
+            result = await function(**args)
             actual_status = result.get("status")
-            
             passed = actual_status == expected_status
-            self.total_tests += 1
-            if passed:
-                self.passed_tests += 1
             
-            test_result = {
+            status_emoji = "✅" if passed else "❌"
+            logger.info(f"{status_emoji} {test_name}: {actual_status}")
+            
+            return {
                 "test_name": test_name,
                 "passed": passed,
                 "expected_status": expected_status,
@@ -81,18 +126,10 @@ class AgentEvaluator:
                 "timestamp": datetime.now().isoformat()
             }
             
-            self.results.append(test_result)
-            
-            status_emoji = "✅" if passed else "❌"
-            logger.info(f"{status_emoji} {test_name}: {actual_status}")
-            
-            return test_result
-            
         except Exception as e:
             logger.error(f"❌ {test_name} failed with exception: {str(e)}")
-            self.total_tests += 1
             
-            test_result = {
+            return {
                 "test_name": test_name,
                 "passed": False,
                 "expected_status": expected_status,
@@ -100,9 +137,27 @@ class AgentEvaluator:
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
-            
-            self.results.append(test_result)
-            return test_result
+    
+    def record(self, test_result: Dict[str, Any]) -> None:
+        """Add a finished test result to the running totals."""
+        self.total_tests += 1
+        if test_result["passed"]:
+            self.passed_tests += 1
+        self.results.append(test_result)
+    
+    def record_check(self, test_name: str, expected: Any, actual: Any) -> bool:
+        """Record a direct equality check (no tool call) and print it."""
+        passed = expected == actual
+        self.record({
+            "test_name": test_name,
+            "passed": passed,
+            "expected_status": repr(expected),
+            "actual_status": repr(actual),
+            "timestamp": datetime.now().isoformat()
+        })
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"  {status}: {test_name}")
+        return passed
     
     def get_summary(self) -> Dict[str, Any]:
         """Generate evaluation summary with scores."""
@@ -138,9 +193,16 @@ class AgentEvaluator:
                 print(f"    Got: {result.get('actual_status', 'N/A')}")
         
         print("\n" + "=" * 60)
+    
+    def save_results(self, path: str = RESULTS_PATH):
+        """Write detailed results as JSON Lines (one test per line)."""
+        with open(path, "wb") as f:
+            for result in self.results:
+                f.write(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE))
+        print(f"Detailed results written to {path}")
 
 
-def run_tool_evaluations():
+async def run_tool_evaluations():
     """
     Run comprehensive tool function evaluations.
     
@@ -148,137 +210,175 @@ def run_tool_evaluations():
     - Correct behavior with valid data
     - Proper error handling with invalid data
     - Expected response structure
+    
+    Independent cases run concurrently (at most MAX_CONCURRENCY at once);
+    reads run only after the writes they depend on.
     """
     evaluator = AgentEvaluator()
     
     print("\n🔍 Starting Tool Function Evaluations...\n")
     
     # =========================
-    # SYMPTOM LOGGING TESTS
+    # SYMPTOM LOGGING & MEDICATION TRACKING TESTS
     # =========================
-    print("Testing log_symptom()...")
-    
-    # Valid symptom log
-    evaluator.evaluate_tool_function(
-        "Log valid symptom",
-        log_symptom,
-        {"symptom_name": "headache", "severity": 7, "notes": "throbbing pain"},
-        "success"
-    )
-    
-    # Minimum severity
-    evaluator.evaluate_tool_function(
-        "Log symptom with minimum severity",
-        log_symptom,
-        {"symptom_name": "mild nausea", "severity": 1},
-        "success"
-    )
-    
-    # Maximum severity
-    evaluator.evaluate_tool_function(
-        "Log symptom with maximum severity",
-        log_symptom,
-        {"symptom_name": "severe migraine", "severity": 10},
-        "success"
-    )
-    
-    # Invalid severity (too low)
-    evaluator.evaluate_tool_function(
-        "Reject symptom with invalid severity (0)",
-        log_symptom,
-        {"symptom_name": "headache", "severity": 0},
-        "error"
-    )
-    
-    # Invalid severity (too high)
-    evaluator.evaluate_tool_function(
-        "Reject symptom with invalid severity (11)",
-        log_symptom,
-        {"symptom_name": "headache", "severity": 11},
-        "error"
-    )
+    # These calls are independent of each other, so they run concurrently
+    print("Testing log_symptom() and track_medication()...")
+    
+    await evaluator.evaluate_tool_functions([
+        # Valid symptom log
+        ("Log valid symptom", log_symptom,
+         {"symptom_name": "headache", "severity": 7, "notes": "throbbing pain"}, "success"),
+        # Minimum severity
+        ("Log symptom with minimum severity", log_symptom,
+         {"symptom_name": "mild nausea", "severity": 1}, "success"),
+        # Maximum severity
+        ("Log symptom with maximum severity", log_symptom,
+         {"symptom_name": "severe migraine", "severity": 10}, "success"),
+        # Invalid severity (too low)
+        ("Reject symptom with invalid severity (0)", log_symptom,
+         {"symptom_name": "headache", "severity": 0}, "error"),
+        # Invalid severity (too high)
+        ("Reject symptom with invalid severity (11)", log_symptom,
+         {"symptom_name": "headache", "severity": 11}, "error"),
+        # Valid medication with time
+        ("Track medication with time", track_medication,
+         {"medication_name": "aspirin", "dosage": "100mg", "time_taken": "08:30"}, "success"),
+        # Valid medication without time (auto-fill)
+        ("Track medication with auto-filled time", track_medication,
+         {"medication_name": "ibuprofen", "dosage": "200mg"}, "success"),
+        # Valid medication with tablet dosage
+        ("Track medication with tablet dosage", track_medication,
+         {"medication_name": "vitamin D", "dosage": "2 tablets"}, "success"),
+    ])
     
     # =========================
-    # MEDICATION TRACKING TESTS
+    # PATTERN ANALYSIS & SUMMARY GENERATION TESTS
     # =========================
-    print("\nTesting track_medication()...")
-    
-    # Valid medication with time
-    evaluator.evaluate_tool_function(
-        "Track medication with time",
-        track_medication,
-        {"medication_name": "aspirin", "dosage": "100mg", "time_taken": "08:30"},
-        "success"
-    )
+    # Read-only checks run after the writes above so there is data to analyze
+    print("\nTesting analyze_patterns() and get_health_summary()...")
     
-    # Valid medication without time (auto-fill)
-    evaluator.evaluate_tool_function(
-        "Track medication with auto-filled time",
-        track_medication,
-        {"medication_name": "ibuprofen", "dosage": "200mg"},
-        "success"
-    )
-    
-    # Valid medication with tablet dosage
-    evaluator.evaluate_tool_function(
-        "Track medication with tablet dosage",
-        track_medication,
-        {"medication_name": "vitamin D", "dosage": "2 tablets"},
-        "success"
-    )
+    await evaluator.evaluate_tool_functions([
+        ("Analyze patterns with data", analyze_patterns, {}, "success"),
+        ("Generate health summary", get_health_summary, {}, "success"),
+    ])
     
     # =========================
-    # PATTERN ANALYSIS TESTS
-    # =========================
-    print("\nTesting analyze_patterns()...")
-    
-    # Should work with existing data
-    evaluator.evaluate_tool_function(
-        "Analyze patterns with data",
-        analyze_patterns,
-        {},
-        "success"
-    )
-    
+    # SUMMARY CACHE TESTS
     # =========================
-    # SUMMARY GENERATION TESTS
-    # =========================
-    print("\nTesting get_health_summary()...")
-    
-    evaluator.evaluate_tool_function(
-        "Generate health summary",
-        get_health_summary,
-        {},
-        "success"
-    )
-    
-    # Print results
-    evaluator.print_report()
+    # get_health_summary() is cached until the store changes; a cached hit
+    # must not share state with earlier results, and writes must invalidate
+    print("\nTesting get_health_summary() caching...")
+    
+    first = await get_health_summary()
+    expected = orjson.loads(orjson.dumps(first))
+    first["symptoms"].clear()
+    first["medications"].clear()
+    first["summary"]["top_symptoms"].clear()
+    evaluator.record_check("Cached summary unaffected by caller mutation",
+                           expected, await get_health_summary())
+    
+    await log_symptom("fatigue", 3)
+    refreshed = await get_health_summary()
+    evaluator.record_check("Summary refreshed after log_symptom",
+                           "fatigue", refreshed["symptoms"][-1]["symptom"])
     
     return evaluator
 
 
-def evaluate_agent_responses():
+# Routing test cases: (user prompt, specialist the coordinator should call)
+AGENT_TEST_CASES = [
+    ("I have a bad headache", "symptom_agent"),
+    ("My stomach has been hurting since lunch", "symptom_agent"),
+    ("I took aspirin this morning", "medication_agent"),
+    ("Just had 2 tablets of vitamin D", "medication_agent"),
+    ("What patterns do you see in my symptoms?", "pattern_agent"),
+    ("Which symptom do I log most often?", "pattern_agent"),
+    ("I need a summary for my doctor", "summary_agent"),
+    ("Prepare my notes for tomorrow's appointment", "summary_agent"),
+]
+
+
+def evaluate_agent_responses(evaluator: AgentEvaluator = None,
+                             timeout: float = BATCH_TIMEOUT_SECONDS) -> AgentEvaluator:
     """
-    Evaluate end-to-end agent responses (requires async).
+    Evaluate coordinator routing through the Gemini Batch API.
+    
+    Every test prompt is submitted in a single batch job with the
+    coordinator's instruction and the specialists declared as functions.
+    A test passes when the model calls the expected specialist.
     
-    This would test the full agent flow including:
-    - Intent recognition
-    - Appropriate agent routing
-    - Response quality
-    - Multi-turn conversations
+    Batch jobs are non-interactive (minutes, not seconds) but billed at
+    a discount, which suits offline evaluation. Requires GOOGLE_API_KEY.
     
-    Note: Full implementation requires async execution and proper setup.
+    Args:
+        evaluator: Evaluator to record results into (a new one if None)
+        timeout: Seconds to wait for the batch job; on expiry the job is
+            cancelled and every routing case is recorded as failed
+    
+    Returns:
+        The evaluator holding the routing results
     """
+    evaluator = evaluator or AgentEvaluator()
+    
     print("\n🤖 Agent Response Evaluation")
     print("=" * 60)
-    print("Note: Full agent evaluation requires async context.")
-    print("Tool evaluations above verify core functionality.")
-    print("For production, integrate with ADK's evaluation framework.")
+    
+    if not os.environ.get("GOOGLE_API_KEY"):
+        print("Skipped: set GOOGLE_API_KEY to run the batch routing evaluation.")
+        print("=" * 60)
+        return evaluator
+    
+    specialist_tool = types.Tool(function_declarations=[
+        types.FunctionDeclaration(
+            name=tool.agent.name,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={"request": types.Schema(type=types.Type.STRING)},
+                required=["request"],
+            ),
+        )
+        for tool in health_coordinator.tools
+    ])
+    requests = [
+        build_request(prompt, health_coordinator.instruction, [specialist_tool])
+        for prompt, _ in AGENT_TEST_CASES
+    ]
+    
+    print(f"Submitting {len(requests)} prompts as one batch job...")
+    try:
+        job = wait_for_batch(
+            submit_batch(requests, "health-journal-routing-eval"), timeout=timeout
+        )
+        print(f"Batch job finished: {job.state}")
+        responses = batch_responses(job)
+    except TimeoutError as e:
+        print(f"❌ {e}")
+        responses = None
+    
+    for i, (prompt, expected_agent) in enumerate(AGENT_TEST_CASES):
+        if responses is None:
+            actual, passed = "timeout", False
+        else:
+            response = responses[i] if i < len(responses) else None
+            called = [fc.name for fc in (response.function_calls or [])] if response else []
+            actual = called[0] if called else "no_call"
+            passed = expected_agent in called
+        
+        evaluator.record({
+            "test_name": f"Route: {prompt}",
+            "passed": passed,
+            "expected_status": expected_agent,
+            "actual_status": actual,
+            "timestamp": datetime.now().isoformat()
+        })
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"  {status}: Route: {prompt} -> {actual}")
+    
     print("=" * 60)
+    return evaluator
 
 
-def evaluate_data_quality():
+async def evaluate_data_quality():
     """
     Evaluate the quality and consistency of stored data.
     
@@ -293,7 +393,7 @@ def evaluate_data_quality():
     issues = []
     
     # Check symptoms
-    symptoms = store.get_symptoms(limit=100)
+    symptoms = [asdict(s) for s in await store.get_symptoms(limit=100)]
     print(f"\nChecking {len(symptoms)} symptom entries...")
     
     for i, symptom in enumerate(symptoms):
@@ -307,7 +407,7 @@ def evaluate_data_quality():
                 issues.append(f"Symptom {i}: Invalid severity {symptom['severity']}")
     
     # Check medications
-    medications = store.get_medications(limit=100)
+    medications = [asdict(m) for m in await store.get_medications(limit=100)]
     print(f"Checking {len(medications)} medication entries...")
     
     for i, med in enumerate(medications):
@@ -327,6 +427,116 @@ def evaluate_data_quality():
     print("=" * 60)
 
 
+async def evaluate_storage(evaluator: AgentEvaluator = None) -> AgentEvaluator:
+    """
+    Check HealthStore invariants on fresh stores (the global store is untouched).
+    
+    Checks, for both an in-memory and a file-backed (WAL) store:
+    - Eviction keeps only the newest max_entries rows
+    - Tied pattern counts keep first-logged order (MIN(id))
+    - The version counter bumps once per write and not on reads
+    
+    Returns:
+        The evaluator holding the storage results
+    """
+    evaluator = evaluator or AgentEvaluator()
+    
+    print("\n🗄️  Storage Evaluation")
+    print("=" * 60)
+    
+    check = evaluator.record_check
+    
+    def entry(name: str, severity: int = 5) -> SymptomEntry:
+        return SymptomEntry(name, severity, "", datetime.now().isoformat())
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, path in (("memory", ":memory:"), ("file", tmp)):
+            def fresh(name: str, **kwargs) -> HealthStore:
+                return HealthStore(
+                    path if label == "memory" else os.path.join(path, name), **kwargs
+                )
+            
+            # Eviction: 5 writes with a bound of 3 keep the newest 3
+            with fresh("eviction.db", max_entries=3) as s:
+                for name in ["a", "b", "c", "d", "e"]:
+                    await s.add_symptom(entry(name))
+                kept = [e.symptom for e in await s.get_symptoms(limit=100)]
+                check(f"Storage ({label}): eviction keeps newest max_entries",
+                      ["c", "d", "e"], kept)
+                
+                # Version: one bump per write, none per read
+                check(f"Storage ({label}): version bumps per write", 5, s.version)
+                await s.get_symptom_patterns()
+                check(f"Storage ({label}): reads leave version unchanged", 5, s.version)
+            
+            # Ties: equal counts keep first-logged order
+            with fresh("ties.db") as s:
+                for name, severity in [("y", 2), ("x", 4), ("x", 6), ("y", 8), ("z", 1)]:
+                    await s.add_symptom(entry(name, severity))
+                check(f"Storage ({label}): tied patterns keep first-logged order",
+                      [("y", 2, 10), ("x", 2, 10), ("z", 1, 1)],
+                      await s.get_symptom_patterns())
+    
+    print("=" * 60)
+    return evaluator
+
+
+def evaluate_agent_pool(evaluator: AgentEvaluator = None) -> AgentEvaluator:
+    """
+    Check AgentPool keying on a private pool (the global pool is untouched).
+    
+    Simulates a module reload by rebuilding agents with the same names:
+    - An identical configuration reuses the pooled instance
+    - A changed specialist instruction rebuilds the coordinator wrapping it
+    - A reloaded tool function (same name, new object) rebuilds its agent
+    
+    Returns:
+        The evaluator holding the pool results
+    """
+    evaluator = evaluator or AgentEvaluator()
+    check = evaluator.record_check
+    
+    print("\n🧩 Agent Pool Evaluation")
+    print("=" * 60)
+    
+    agent_pool = AgentPool()
+    
+    def pooled(name: str, instruction: str, **kwargs) -> LlmAgent:
+        return agent_pool.acquire(
+            pool_key(name, MODEL_NAME, instruction, **kwargs),
+            lambda: LlmAgent(name=name, model=MODEL_NAME,
+                             instruction=instruction, **kwargs),
+        )
+    
+    def build(specialist_instruction: str, tool) -> tuple:
+        specialist = pooled("specialist", specialist_instruction, tools=[tool])
+        coordinator = pooled("coordinator", "Route requests.",
+                             tools=[AgentTool(agent=specialist)])
+        return specialist, coordinator
+    
+    specialist, coordinator = build("Log symptoms.", log_symptom)
+    
+    again = build("Log symptoms.", log_symptom)
+    check("Pool: identical configuration reuses agents",
+          True, again[0] is specialist and again[1] is coordinator)
+    
+    changed = build("Log symptoms carefully.", log_symptom)
+    check("Pool: changed specialist rebuilds its coordinator",
+          True, changed[1] is not coordinator and changed[1].tools[0].agent is changed[0])
+    
+    # A reload re-executes the def: same module and qualname, new object
+    reloaded_tool = pytypes.FunctionType(
+        log_symptom.__code__, log_symptom.__globals__, log_symptom.__name__,
+        log_symptom.__defaults__, log_symptom.__closure__,
+    )
+    reloaded = build("Log symptoms.", reloaded_tool)
+    check("Pool: reloaded tool function rebuilds its agent",
+          True, reloaded[0] is not specialist and reloaded[0].tools[0] is reloaded_tool)
+    
+    print("=" * 60)
+    return evaluator
+
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("HEALTH JOURNAL AGENT - COMPREHENSIVE EVALUATION")
@@ -334,9 +544,15 @@ if __name__ == "__main__":
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Run all evaluations
-    evaluator = run_tool_evaluations()
-    evaluate_data_quality()
-    evaluate_agent_responses()
+    evaluator = asyncio.run(run_tool_evaluations())
+    asyncio.run(evaluate_data_quality())
+    asyncio.run(evaluate_storage(evaluator))
+    evaluate_agent_pool(evaluator)
+    # Routing results count towards the final pass rate and the JSONL file
+    evaluate_agent_responses(evaluator)
+    # Reported once everything is recorded, so the details match the totals
+    evaluator.print_report()
+    evaluator.save_results()
     
     # Final summary
     summary = evaluator.get_summary()
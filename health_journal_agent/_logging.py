@@ -0,0 +1,30 @@
+# _logging.py
+"""
+Logging setup shared by the Smart Health Journal Agent package.
+
+Importing this module configures the root logger exactly once. Records
+go through a QueueHandler and are written by a QueueListener thread, so
+log I/O never blocks the event loop or tool calls.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Respect handlers installed by the host (ADK CLI, tests, notebooks)
+if not logging.root.handlers:
+    _log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        format=LOG_FORMAT,
+        handlers=[logging.handlers.QueueHandler(_log_queue)],
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+logger = logging.getLogger("health_journal_agent")
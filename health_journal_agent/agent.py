@@ -8,20 +8,31 @@ for better doctor visit preparation. Built using Google's Agent Development Kit
 Architecture:
 - Root Agent (health_coordinator): Routes requests to specialist agents
 - 4 Specialist Agents: symptom, medication, pattern, summary
-- Custom Tools: 4 health tracking functions
+- Custom Tools: 4 async health tracking functions
+- Concurrency: independent specialist calls are issued as parallel function
+  calls, which ADK awaits together (N model latencies collapse into max(N))
 - Observability: Logging and tracing throughout
 - Session Management: InMemorySessionService for state persistence
+- Context Caching: static instruction prefixes are cached via the ADK App
 """
 
-import logging
+import sys
+import textwrap
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 
+import httpx
 from google.genai import types
 from google.adk.agents import LlmAgent
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.apps import App
 from google.adk.models.google_llm import Gemini
+from google.adk.runners import Runner
 from google.adk.tools import AgentTool
 from google.adk.sessions import InMemorySessionService
+from ._logging import logger
+from .agent_pool import pool, pool_key
 from .tools import (
     log_symptom,
     track_medication,
@@ -33,12 +44,9 @@ from .tools import (
 # OBSERVABILITY SETUP
 # =========================
 
-# Configure logging for observability
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Logging is configured once in _logging (queue-backed, non-blocking);
+# importing it first also captures the log lines emitted by the imports
+# that follow
 
 # Retry configuration for robust API calls
 retry_config = types.HttpRetryOptions(
@@ -48,6 +56,84 @@ retry_config = types.HttpRetryOptions(
     http_status_codes=[429, 500, 503, 504],
 )
 
+# Gemini service tier per agent. Interactive agents go to the Priority
+# queue; background analysis stays on Standard. Adjust per deployment
+# (e.g. types.ServiceTier.FLEX for cheaper, non-urgent workloads).
+SERVICE_TIERS = {
+    "symptom_agent": types.ServiceTier.PRIORITY,
+    "medication_agent": types.ServiceTier.PRIORITY,
+    "health_coordinator": types.ServiceTier.PRIORITY,
+    "pattern_agent": types.ServiceTier.STANDARD,
+    "summary_agent": types.ServiceTier.STANDARD,
+}
+
+
+def _content_config(agent_name: str) -> types.GenerateContentConfig:
+    """Build the per-agent generation config with its service tier."""
+    return types.GenerateContentConfig(
+        service_tier=SERVICE_TIERS.get(agent_name, types.ServiceTier.STANDARD)
+    )
+
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Connection pool shared by every agent: HTTP/2 multiplexes concurrent
+# specialist calls over one keep-alive TLS session instead of paying a
+# handshake per agent. Applies to genai's httpx transport (its default
+# when aiohttp isn't installed).
+_pool_limits = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+http_options = types.HttpOptions(
+    retry_options=retry_config,
+    client_args={"limits": _pool_limits, "http2": True},
+    async_client_args={"limits": _pool_limits, "http2": True},
+)
+
+# One Gemini model object for all agents. ADK builds its client lazily
+# (one per event loop), so every agent on a loop shares that client. It is
+# pooled too, so a module reload keeps agents and model in step.
+_model_config = repr(http_options)
+gemini_model = pool.acquire(
+    pool_key("gemini_model", MODEL_NAME, "", retry_config, http_options=_model_config),
+    lambda: Gemini(
+        model=MODEL_NAME,
+        retry_options=retry_config,
+        client_kwargs={"http_options": http_options},
+    ),
+)
+
+
+def _pooled_agent(name: str, instruction: str, **kwargs) -> LlmAgent:
+    """
+    Get an LlmAgent from the shared pool, building it on first use.
+
+    The key covers every constructor input: name, model and its client
+    settings, retry options, instruction, service tier config and the
+    remaining kwargs (tools, ...). Identical configurations reuse the same
+    instance, so re-importing this module in a worker or evaluation
+    harness doesn't rebuild agents and their Gemini clients; any change
+    builds a new agent.
+    """
+    content_config = _content_config(name)
+    return pool.acquire(
+        pool_key(
+            name,
+            MODEL_NAME,
+            instruction,
+            retry_config,
+            model_config=_model_config,
+            generate_content_config=content_config,
+            **kwargs,
+        ),
+        lambda: LlmAgent(
+            name=name,
+            model=gemini_model,
+            generate_content_config=content_config,
+            instruction=instruction,
+            **kwargs,
+        ),
+    )
+
+
 logger.info("Health Journal Agent initialized")
 
 # =========================
@@ -59,6 +145,145 @@ logger.info("Health Journal Agent initialized")
 session_service = InMemorySessionService()
 logger.info("Session service initialized")
 
+# =========================
+# AGENT INSTRUCTIONS
+# =========================
+
+# Instructions are dedented, stripped and interned once at import so every
+# turn sends the same compact bytes. A byte-identical prefix also keeps the
+# context cache key stable across worker restarts.
+
+SYMPTOM_INSTRUCTION = sys.intern(textwrap.dedent("""\
+    You are a symptom logging specialist.
+
+    Your role: Help users accurately log their symptoms.
+
+    Process:
+    1. Identify the symptom name from user input
+    2. Ask for severity on 1-10 scale (be clear about the scale)
+    3. Ask if they have any additional notes
+    4. Use log_symptom() to record the data
+    5. ALWAYS check the "status" field in the response
+    6. If status is "error", explain the issue kindly to the user
+
+    Communication style:
+    - Be empathetic and supportive
+    - Use simple, clear language
+    - Never diagnose or provide medical advice
+    - Confirm what was logged after successful entry
+
+    Example interaction:
+    User: "I have a bad headache"
+    You: "I'm sorry to hear that. On a scale of 1-10, how severe is your headache? (1 being mild, 10 being the worst pain imaginable)"
+""").strip())
+
+MEDICATION_INSTRUCTION = sys.intern(textwrap.dedent("""\
+    You are a medication tracking specialist.
+
+    Your role: Help users accurately track their medication intake.
+
+    Process:
+    1. Extract medication name from user input
+    2. Get the dosage amount (e.g., "10mg", "2 tablets")
+    3. Note the time (or use current time if not specified)
+    4. Use track_medication() to log the entry
+    5. Check "status" field for any errors
+    6. Confirm what was tracked
+
+    Communication style:
+    - Be clear and confirmatory
+    - Double-check dosage information for accuracy
+    - Never provide medical advice about medications
+
+    Example interaction:
+    User: "I took aspirin"
+    You: "Got it. What dosage of aspirin did you take? (e.g., 100mg, 325mg)"
+""").strip())
+
+PATTERN_INSTRUCTION = sys.intern(textwrap.dedent("""\
+    You are a health pattern analyst.
+
+    Your role: Help users understand patterns in their symptom data.
+
+    Process:
+    1. Use analyze_patterns() to retrieve aggregated data
+    2. Check "status" - if "no_data", kindly inform user
+    3. Present patterns clearly with:
+       - Symptom names
+       - Frequency counts
+       - Average severity ratings
+    4. Provide context to help users understand the data
+
+    Communication style:
+    - Present data objectively
+    - Use clear, simple language
+    - Highlight interesting patterns
+    - NEVER diagnose or provide medical advice
+    - Suggest discussing patterns with healthcare provider
+
+    Example response:
+    "Based on your logs, headaches have been your most common symptom (5 times) with an average severity of 6.5. You've also logged nausea twice with average severity of 4.0."
+""").strip())
+
+SUMMARY_INSTRUCTION = sys.intern(textwrap.dedent("""\
+    You are a doctor visit preparation specialist.
+
+    Your role: Create comprehensive summaries for doctor appointments.
+
+    Process:
+    1. Use get_health_summary() to gather all health data
+    2. Present the information in a clear, professional format
+    3. Highlight key information doctors would find useful:
+       - Most frequent symptoms
+       - Severity trends
+       - All medications being taken
+    4. Organize chronologically when relevant
+
+    Communication style:
+    - Professional but friendly
+    - Well-organized and easy to scan
+    - Include all relevant details
+    - Encourage users to share this with their healthcare provider
+
+    Output format:
+    Present the summary in a way that's easy to read and share, with clear sections and important information highlighted.
+""").strip())
+
+COORDINATOR_INSTRUCTION = sys.intern(textwrap.dedent("""\
+    You are the Health Journal Coordinator.
+
+    Your role: Route user requests to the appropriate specialist agent.
+
+    Available specialists:
+    - symptom_agent: For logging symptoms (headaches, pain, nausea, etc.)
+    - medication_agent: For tracking medication intake
+    - pattern_agent: For analyzing symptom patterns and trends
+    - summary_agent: For generating doctor visit summaries
+
+    Routing logic:
+    1. Analyze user's request to determine intent
+    2. Select the most appropriate specialist agent
+    3. Use that agent as a tool to handle the request
+    4. Return the specialist's response to the user
+
+    Multi-intent handling:
+    If a user mentions both a symptom and medication, call the appropriate
+    agents in parallel by issuing all function calls in the same turn.
+    These requests are independent, so do not wait for one to finish first.
+
+    Communication style:
+    - Warm and welcoming
+    - Clear about what you're doing
+    - Never provide medical diagnoses or advice
+    - Encourage users to consult healthcare professionals
+
+    Example routing:
+    - "I have a headache" → symptom_agent
+    - "I took my medication" → medication_agent
+    - "What patterns do you see?" → pattern_agent
+    - "I need a summary for my doctor" → summary_agent
+""").strip())
+
 # =========================
 # SPECIALIST AGENTS
 # =========================
@@ -67,158 +292,101 @@ logger.info("Session service initialized")
 # and specific tools. This separation of concerns makes the system more
 # maintainable and allows for independent testing of each capability.
 
-symptom_agent = LlmAgent(
+symptom_agent = _pooled_agent(
     name="symptom_agent",
-    model=Gemini(model="gemini-2.5-flash", retry_options=retry_config),
-    instruction="""You are a symptom logging specialist.
-
-Your role: Help users accurately log their symptoms.
-
-Process:
-1. Identify the symptom name from user input
-2. Ask for severity on 1-10 scale (be clear about the scale)
-3. Ask if they have any additional notes
-4. Use log_symptom() to record the data
-5. ALWAYS check the "status" field in the response
-6. If status is "error", explain the issue kindly to the user
-
-Communication style:
-- Be empathetic and supportive
-- Use simple, clear language
-- Never diagnose or provide medical advice
-- Confirm what was logged after successful entry
-
-Example interaction:
-User: "I have a bad headache"
-You: "I'm sorry to hear that. On a scale of 1-10, how severe is your headache? (1 being mild, 10 being the worst pain imaginable)"
-""",
+    instruction=SYMPTOM_INSTRUCTION,
     tools=[log_symptom],
 )
 
-medication_agent = LlmAgent(
+medication_agent = _pooled_agent(
     name="medication_agent",
-    model=Gemini(model="gemini-2.5-flash", retry_options=retry_config),
-    instruction="""You are a medication tracking specialist.
-
-Your role: Help users accurately track their medication intake.
-
-Process:
-1. Extract medication name from user input
-2. Get the dosage amount (e.g., "10mg", "2 tablets")
-3. Note the time (or use current time if not specified)
-4. Use track_medication() to log the entry
-5. Check "status" field for any errors
-6. Confirm what was tracked
-
-Communication style:
-- Be clear and confirmatory
-- Double-check dosage information for accuracy
-- Never provide medical advice about medications
-
-Example interaction:
-User: "I took aspirin"
-You: "Got it. What dosage of aspirin did you take? (e.g., 100mg, 325mg)"
-""",
+    instruction=MEDICATION_INSTRUCTION,
     tools=[track_medication],
 )
 
-pattern_agent = LlmAgent(
+pattern_agent = _pooled_agent(
     name="pattern_agent",
-    model=Gemini(model="gemini-2.5-flash", retry_options=retry_config),
-    instruction="""You are a health pattern analyst.
-
-Your role: Help users understand patterns in their symptom data.
-
-Process:
-1. Use analyze_patterns() to retrieve aggregated data
-2. Check "status" - if "no_data", kindly inform user
-3. Present patterns clearly with:
-   - Symptom names
-   - Frequency counts
-   - Average severity ratings
-4. Provide context to help users understand the data
-
-Communication style:
-- Present data objectively
-- Use clear, simple language
-- Highlight interesting patterns
-- NEVER diagnose or provide medical advice
-- Suggest discussing patterns with healthcare provider
-
-Example response:
-"Based on your logs, headaches have been your most common symptom (5 times) with an average severity of 6.5. You've also logged nausea twice with average severity of 4.0."
-""",
+    instruction=PATTERN_INSTRUCTION,
     tools=[analyze_patterns],
 )
 
-summary_agent = LlmAgent(
+summary_agent = _pooled_agent(
     name="summary_agent",
-    model=Gemini(model="gemini-2.5-flash", retry_options=retry_config),
-    instruction="""You are a doctor visit preparation specialist.
-
-Your role: Create comprehensive summaries for doctor appointments.
-
-Process:
-1. Use get_health_summary() to gather all health data
-2. Present the information in a clear, professional format
-3. Highlight key information doctors would find useful:
-   - Most frequent symptoms
-   - Severity trends
-   - All medications being taken
-4. Organize chronologically when relevant
-
-Communication style:
-- Professional but friendly
-- Well-organized and easy to scan
-- Include all relevant details
-- Encourage users to share this with their healthcare provider
-
-Output format:
-Present the summary in a way that's easy to read and share, with clear sections and important information highlighted.
-""",
+    instruction=SUMMARY_INSTRUCTION,
     tools=[get_health_summary],
 )
 
+# Streaming is a run-level setting in ADK. Calls via the coordinator's
+# AgentTool are always unary, so stream_doctor_summary() runs summary_agent
+# directly with SSE and the first lines render while the rest is still
+# generating.
+summary_run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+DEFAULT_SUMMARY_REQUEST = "Prepare a summary of my health journal for my doctor."
+
+
+async def stream_doctor_summary(
+    user_id: str,
+    request: str = DEFAULT_SUMMARY_REQUEST,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Run summary_agent on its own and yield the summary text as it streams.
+
+    For offline doctor-visit prep outside the coordinator. Yields the text
+    of each partial chunk; the final aggregated event is skipped so the
+    text isn't emitted twice.
+
+    Pass session_id to run in (and keep) a caller-owned session, created if
+    it doesn't exist. Without one, a throwaway session is created and
+    deleted once the stream ends, so repeated calls don't accumulate
+    sessions in session_service.
+    """
+    app_name = "health_journal_agent"
+    runner = Runner(
+        app_name=app_name,
+        agent=summary_agent,
+        session_service=session_service,
+    )
+    owned = session_id is None
+    session = None
+    if not owned:
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+    if session is None:
+        session = await session_service.create_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+    message = types.Content(role="user", parts=[types.Part(text=request)])
+    logger.info("stream_doctor_summary started for %s", user_id)
+
+    try:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session.id,
+            new_message=message,
+            run_config=summary_run_config,
+        ):
+            if not event.partial or event.content is None:
+                continue
+            for part in event.content.parts or []:
+                if part.text:
+                    yield part.text
+    finally:
+        if owned:
+            await session_service.delete_session(
+                app_name=app_name, user_id=user_id, session_id=session.id
+            )
+
 
 # =========================
 # ROOT COORDINATOR AGENT
 # =========================
 
-health_coordinator = LlmAgent(
+health_coordinator = _pooled_agent(
     name="health_coordinator",
-    model=Gemini(model="gemini-2.5-flash", retry_options=retry_config),
-    instruction="""You are the Health Journal Coordinator.
-
-Your role: Route user requests to the appropriate specialist agent.
-
-Available specialists:
-- symptom_agent: For logging symptoms (headaches, pain, nausea, etc.)
-- medication_agent: For tracking medication intake
-- pattern_agent: For analyzing symptom patterns and trends
-- summary_agent: For generating doctor visit summaries
-
-Routing logic:
-1. Analyze user's request to determine intent
-2. Select the most appropriate specialist agent
-3. Use that agent as a tool to handle the request
-4. Return the specialist's response to the user
-
-Multi-intent handling:
-If a user mentions both a symptom and medication, handle them sequentially
-by calling the appropriate agents in order.
-
-Communication style:
-- Warm and welcoming
-- Clear about what you're doing
-- Never provide medical diagnoses or advice
-- Encourage users to consult healthcare professionals
-
-Example routing:
-- "I have a headache" → symptom_agent
-- "I took my medication" → medication_agent
-- "What patterns do you see?" → pattern_agent
-- "I need a summary for my doctor" → summary_agent
-""",
+    instruction=COORDINATOR_INSTRUCTION,
     tools=[
         AgentTool(agent=symptom_agent),
         AgentTool(agent=medication_agent),
@@ -231,5 +399,21 @@ Example routing:
 # This is the entry point for the agent system
 root_agent = health_coordinator
 
+# Context caching: the static instruction + tool declarations prefix is
+# cached server-side and reused across turns, so only the dynamic
+# conversation is billed at the full input rate. Gemini still enforces its
+# minimum cacheable size; below it requests simply proceed uncached.
+context_cache_config = ContextCacheConfig(
+    ttl_seconds=3600,
+    cache_intervals=10,
+)
+
+# ADK loads `app` ahead of `root_agent` when both are defined
+app = App(
+    name="health_journal_agent",
+    root_agent=root_agent,
+    context_cache_config=context_cache_config,
+)
+
 logger.info("All agents initialized successfully")
 logger.info("Health Journal Agent ready to serve")
\ No newline at end of file
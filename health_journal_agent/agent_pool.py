@@ -0,0 +1,153 @@
+# agent_pool.py
+"""
+Agent instance pool for Smart Health Journal Agent.
+
+Re-importing agent.py (multi-worker servers, evaluation harnesses that
+reload the package per test) would otherwise build fresh LlmAgent and
+Gemini objects every time, repeating client setup. The pool hands back
+an existing instance for an identical configuration instead.
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (agent name, model, retry options digest, instruction digest,
+#  digest of every other constructor argument)
+PoolKey = Tuple[str, str, str, str, str]
+
+# Drop strong references to agents nobody has acquired for this long
+DEFAULT_MAX_IDLE_SECONDS = 15 * 60
+
+
+def _digest(value: str) -> str:
+    """Short stable digest so long instructions don't bloat pool keys."""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def _config_repr(value: Any) -> str:
+    """Stable text form of a constructor argument for digesting."""
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_config_repr(v) for v in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ",".join(
+            f"{k}={_config_repr(v)}" for k, v in sorted(value.items())
+        ) + "}"
+    # Tools are keyed on the identity of what they wrap, not their name: a
+    # rebuilt sub-agent or a reloaded function is a new object, so the agent
+    # using it is rebuilt too. The pooled agent holds these objects, so
+    # their ids can't be reused while its entry exists.
+    wrapped = getattr(value, "agent", None)
+    if wrapped is not None:
+        return f"{type(value).__name__}:{wrapped.name}@{id(wrapped):x}"
+    if callable(value) and hasattr(value, "__code__"):
+        return f"{value.__module__}.{value.__qualname__}@{id(value):x}"
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json()
+    name = getattr(value, "name", None)
+    if isinstance(name, str):
+        return f"{type(value).__name__}:{name}@{id(value):x}"
+    return repr(value)
+
+
+def pool_key(
+    name: str,
+    model: str,
+    instruction: str,
+    retry_options: Optional[Any] = None,
+    **config: Any,
+) -> PoolKey:
+    """
+    Build the pool key for an agent configuration.
+
+    Any extra constructor arguments (tools, generate_content_config, model
+    client settings, ...) go in **config; configurations that differ in
+    any of them get different keys.
+    """
+    retry_repr = retry_options.model_dump_json() if retry_options is not None else ""
+    return (
+        name,
+        model,
+        _digest(retry_repr),
+        _digest(instruction),
+        _digest(_config_repr(config)),
+    )
+
+
+class AgentPool:
+    """
+    Thread-safe pool of agent instances keyed by configuration.
+
+    Design:
+    - Instances live in a WeakValueDictionary, so an agent still referenced
+      anywhere (e.g. as a sub-agent tool) is always reused.
+    - The pool also keeps a strong reference plus a last-used timestamp;
+      cleanup() drops strong references idle longer than max_idle_seconds
+      so unused agents can be garbage collected.
+    - cleanup() runs opportunistically from acquire() at most once per
+      max_idle_seconds, so no background thread is needed.
+    """
+
+    def __init__(self, max_idle_seconds: float = DEFAULT_MAX_IDLE_SECONDS) -> None:
+        self.max_idle_seconds = max_idle_seconds
+        self._instances: "weakref.WeakValueDictionary[PoolKey, Any]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._strong: Dict[PoolKey, Any] = {}
+        self._last_used: Dict[PoolKey, float] = {}
+        self._last_cleanup = time.monotonic()
+        self._lock = threading.Lock()
+        logger.info("AgentPool initialized")
+
+    def acquire(self, config_key: PoolKey, factory: Callable[[], T]) -> T:
+        """Return the pooled instance for config_key, creating it if needed."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_cleanup >= self.max_idle_seconds:
+                self._cleanup_locked(now)
+
+            instance = self._instances.get(config_key)
+            if instance is None:
+                instance = factory()
+                self._instances[config_key] = instance
+                logger.info("AgentPool created instance for %s", config_key[0])
+            else:
+                logger.debug("AgentPool reused instance for %s", config_key[0])
+
+            self._strong[config_key] = instance
+            self._last_used[config_key] = now
+            return instance
+
+    def cleanup(self) -> int:
+        """Release idle entries. Returns the number of entries released."""
+        with self._lock:
+            return self._cleanup_locked(time.monotonic())
+
+    def _cleanup_locked(self, now: float) -> int:
+        self._last_cleanup = now
+        idle = [
+            key
+            for key, last_used in self._last_used.items()
+            if now - last_used > self.max_idle_seconds
+        ]
+        for key in idle:
+            self._strong.pop(key, None)
+            self._last_used.pop(key, None)
+        if idle:
+            logger.info("AgentPool released %d idle instances", len(idle))
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+
+# Global pool instance used by agent.py
+pool = AgentPool()
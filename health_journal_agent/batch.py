@@ -0,0 +1,182 @@
+# batch.py
+"""
+Gemini Batch API helpers for Smart Health Journal Agent.
+
+Offline workloads - evaluation runs and doctor-visit preparation for
+many users - don't need interactive latency. Submitting them as a single
+batch job is billed at a discount and parallelized server-side instead
+of making one synchronous call per prompt.
+"""
+
+from __future__ import annotations
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODEL = "gemini-2.5-flash"
+POLL_INTERVAL_SECONDS = 30
+
+_FINAL_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+_client: Optional[genai.Client] = None
+
+
+def _get_client() -> genai.Client:
+    """Lazily create the client so importing this module needs no API key."""
+    global _client
+    if _client is None:
+        _client = genai.Client()
+    return _client
+
+
+def build_request(
+    prompt: str,
+    system_instruction: str,
+    tools: Optional[List[types.Tool]] = None,
+) -> types.InlinedRequest:
+    """Build one inlined batch request for a single user prompt."""
+    return types.InlinedRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+        config=types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            tools=tools,
+        ),
+    )
+
+
+def submit_batch(
+    requests: List[types.InlinedRequest], display_name: str
+) -> types.BatchJob:
+    """Submit inlined requests as a single batch job."""
+    job = _get_client().batches.create(
+        model=BATCH_MODEL,
+        src=requests,
+        config=types.CreateBatchJobConfig(display_name=display_name),
+    )
+    logger.info("Batch job submitted: %s (%d requests)", job.name, len(requests))
+    return job
+
+
+def wait_for_batch(
+    job: types.BatchJob,
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+    timeout: Optional[float] = None,
+) -> types.BatchJob:
+    """
+    Poll a batch job until it reaches a final state.
+
+    Args:
+        job: Job returned by submit_batch()
+        poll_interval: Seconds between status checks
+        timeout: Seconds to wait before giving up (None waits for the
+            full batch window, which can be up to 24h)
+
+    Raises:
+        TimeoutError: The job did not finish within `timeout`; it has
+            been cancelled so it stops consuming quota.
+    """
+    client = _get_client()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while job.state not in _FINAL_STATES:
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning("Batch job %s timed out after %ss; cancelling", job.name, timeout)
+            client.batches.cancel(name=job.name)
+            raise TimeoutError(f"Batch job {job.name} did not finish within {timeout}s")
+        sleep_for = poll_interval
+        if deadline is not None:
+            sleep_for = max(0.0, min(poll_interval, deadline - time.monotonic()))
+        time.sleep(sleep_for)
+        job = client.batches.get(name=job.name)
+        logger.info("Batch job %s: %s", job.name, job.state)
+    return job
+
+
+def batch_responses(
+    job: types.BatchJob,
+) -> List[Optional[types.GenerateContentResponse]]:
+    """Return per-request responses in submission order (None on error)."""
+    if job.dest is None or not job.dest.inlined_responses:
+        return []
+    return [
+        None if item.error else item.response
+        for item in job.dest.inlined_responses
+    ]
+
+
+def get_health_summary_batch(
+    summaries_by_user: Dict[str, Dict[str, Any]],
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Render doctor-visit summaries for many users in one batch job.
+
+    Args:
+        summaries_by_user: get_health_summary() results keyed by user id.
+        timeout: Seconds to wait for the job (see wait_for_batch).
+
+    Returns:
+        Success: {"status": "success", "summaries": {user_id: text}}
+        Error:   {"status": "error", "error_message": "..."}
+    """
+    # Imported here to avoid building the agent tree for callers that only
+    # need the low-level helpers above.
+    from .agent import summary_agent
+
+    logger.info("get_health_summary_batch called: %d users", len(summaries_by_user))
+
+    if not summaries_by_user:
+        return {"status": "no_data", "message": "No summaries to render"}
+
+    user_ids = list(summaries_by_user)
+    requests = [
+        build_request(
+            orjson.dumps(summaries_by_user[user_id]).decode(),
+            summary_agent.instruction,
+        )
+        for user_id in user_ids
+    ]
+    try:
+        job = wait_for_batch(
+            submit_batch(requests, "health-summary-batch"), timeout=timeout
+        )
+    except TimeoutError as e:
+        return {"status": "error", "error_message": str(e)}
+
+    if job.state not in (
+        types.JobState.JOB_STATE_SUCCEEDED,
+        types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    ):
+        logger.warning("Summary batch job ended in state %s", job.state)
+        return {
+            "status": "error",
+            "error_message": f"Batch job ended in state {job.state}",
+        }
+
+    summaries = {
+        user_id: response.text if response is not None else None
+        for user_id, response in zip(user_ids, batch_responses(job))
+    }
+    logger.info("Summary batch complete: %d summaries", len(summaries))
+
+    return {"status": "success", "summaries": summaries}
+
+
+__all__ = [
+    "build_request",
+    "submit_batch",
+    "wait_for_batch",
+    "batch_responses",
+    "get_health_summary_batch",
+]
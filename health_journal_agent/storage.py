@@ -3,26 +3,90 @@
 Health storage layer for Smart Health Journal Agent.
 
 This module encapsulates how health data (symptoms & medications)
-is stored and retrieved. Currently uses in-memory storage, but
-can be swapped for Firestore/DB later without touching agent logic.
+is stored and retrieved. Currently uses an embedded SQLite database
+(in-memory by default), but can be swapped for Firestore/DB later
+without touching agent logic.
 """
 
 from __future__ import annotations
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Callable, List, Tuple, TypeVar
+import asyncio
 import logging
+import sqlite3
+import threading
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Per-table retention bound; the oldest entries are evicted first
+MAX_ENTRIES = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symptoms (
+    id INTEGER PRIMARY KEY,
+    symptom TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    notes TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symptoms_by_name ON symptoms (symptom);
+CREATE TABLE IF NOT EXISTS medications (
+    id INTEGER PRIMARY KEY,
+    medication TEXT NOT NULL,
+    dosage TEXT NOT NULL,
+    time TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+"""
+
+
+@dataclass(slots=True)
+class SymptomEntry:
+    """A single logged symptom (slotted: no per-instance __dict__)."""
+
+    symptom: str
+    severity: int
+    notes: str
+    timestamp: str
+
+
+@dataclass(slots=True)
+class MedicationEntry:
+    """A single medication intake record."""
+
+    medication: str
+    dosage: str
+    time: str
+    timestamp: str
+
 
 class HealthStore:
     """
-    In-memory storage for health data.
+    SQLite-backed storage for health data.
 
     Design:
-    - Keeps symptoms and medications in simple Python lists.
+    - Keeps symptoms and medications in SQLite tables, bounded to
+      max_entries rows each (MAX_ENTRIES by default).
+    - Stores entries as slotted SymptomEntry/MedicationEntry records.
     - Adds timestamps to all entries.
     - Provides helper methods to retrieve recent items.
+    - Pattern aggregation runs as a single GROUP BY inside SQLite.
+    - A version counter is bumped on every write so callers can cache
+      derived results until the data changes.
+    - Methods are async and serialized with a threading.Lock so specialist
+      agents never interleave writes, whichever event loop or worker
+      thread they run on.
+    - In-memory statements are short and do no I/O, so they run inline on
+      the event loop. File-backed statements (and WAL commits) hit the
+      disk, so they run in a worker thread via asyncio.to_thread; this
+      costs a thread hop per call but keeps the loop responsive.
+
+    Pass a file path instead of ":memory:" to persist the journal; file
+    databases use WAL mode so readers don't block the writer. Call close()
+    (or use the store as a context manager) when done with a file store.
 
     In production, this could be replaced with:
     - Firestore
@@ -32,45 +96,136 @@ class HealthStore:
     without changing agent/tool code.
     """
 
-    def __init__(self) -> None:
-        self.symptoms: List[Dict[str, Any]] = []
-        self.medications: List[Dict[str, Any]] = []
+    def __init__(self, path: str = ":memory:", max_entries: int = MAX_ENTRIES) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._offload = path != ":memory:"
+        self._max_entries = max_entries
+        self._version = 0
         logger.info("HealthStore initialized")
 
+    @property
+    def version(self) -> int:
+        """Monotonic data version, bumped on every write."""
+        return self._version
+
+    def close(self) -> None:
+        """Close the database connection (checkpoints WAL for file stores)."""
+        with self._lock:
+            self._conn.close()
+        logger.info("HealthStore closed")
+
+    def __enter__(self) -> "HealthStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn under the lock, off the event loop for file databases."""
+        if self._offload:
+            return await asyncio.to_thread(self._locked, fn, *args)
+        return self._locked(fn, *args)
+
+    def _locked(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            return fn(*args)
+
+    def _insert(self, table: str, sql: str, params: tuple) -> None:
+        """Insert a row and evict rows beyond max_entries (lock held)."""
+        with self._conn:
+            row_id = self._conn.execute(sql, params).lastrowid
+            self._version += 1
+            if row_id > self._max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE id <= ?",
+                    (row_id - self._max_entries,),
+                )
+
+    def _fetch(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a query and return all rows (lock held)."""
+        return self._conn.execute(sql, params).fetchall()
+
     # ---------- Symptom methods ----------
 
-    def add_symptom(self, data: Dict[str, Any]) -> None:
+    async def add_symptom(self, entry: SymptomEntry) -> None:
         """Add symptom entry with automatic logging."""
-        self.symptoms.append(data)
-        logger.info(
-            "Symptom added: %s (severity: %s)",
-            data.get("symptom"),
-            data.get("severity"),
+        await self._run(
+            self._insert,
+            "symptoms",
+            "INSERT INTO symptoms (symptom, severity, notes, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            (entry.symptom, entry.severity, entry.notes, entry.timestamp),
         )
-
-    def get_symptoms(self, limit: int = 10) -> List[Dict[str, Any]]:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Symptom added: %s (severity: %s)",
+                entry.symptom,
+                entry.severity,
+            )
+
+    async def get_symptoms(self, limit: int = 10) -> List[SymptomEntry]:
         """Retrieve recent symptoms with limit."""
-        results = self.symptoms[-limit:]
-        logger.info("Retrieved %d symptoms", len(results))
+        rows = await self._run(
+            self._fetch,
+            "SELECT symptom, severity, notes, timestamp FROM symptoms ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        results = [SymptomEntry(*row) for row in reversed(rows)]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Retrieved %d symptoms", len(results))
         return results
 
+    async def get_symptom_patterns(self) -> List[Tuple[str, int, int]]:
+        """
+        Per-symptom (name, count, severity sum), most frequent first.
+
+        Ties keep first-logged order.
+        """
+        return await self._run(
+            self._fetch,
+            "SELECT symptom, COUNT(*), SUM(severity) FROM symptoms "
+            "GROUP BY symptom ORDER BY COUNT(*) DESC, MIN(id)",
+        )
+
     # ---------- Medication methods ----------
 
-    def add_medication(self, data: Dict[str, Any]) -> None:
+    async def add_medication(self, entry: MedicationEntry) -> None:
         """Add medication entry with automatic logging."""
-        self.medications.append(data)
-        logger.info(
-            "Medication tracked: %s (%s)",
-            data.get("medication"),
-            data.get("dosage"),
+        await self._run(
+            self._insert,
+            "medications",
+            "INSERT INTO medications (medication, dosage, time, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            (entry.medication, entry.dosage, entry.time, entry.timestamp),
         )
-
-    def get_medications(self, limit: int = 10) -> List[Dict[str, Any]]:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Medication tracked: %s (%s)",
+                entry.medication,
+                entry.dosage,
+            )
+
+    async def count_medications(self) -> int:
+        """Number of medication entries in the journal (not just recent ones)."""
+        rows = await self._run(self._fetch, "SELECT COUNT(*) FROM medications")
+        return rows[0][0]
+
+    async def get_medications(self, limit: int = 10) -> List[MedicationEntry]:
         """Retrieve recent medications with limit."""
-        results = self.medications[-limit:]
-        logger.info("Retrieved %d medications", len(results))
+        rows = await self._run(
+            self._fetch,
+            "SELECT medication, dosage, time, timestamp FROM medications ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        results = [MedicationEntry(*row) for row in reversed(rows)]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Retrieved %d medications", len(results))
         return results
 
 
 # Global store instance used by tools & agents
-store = HealthStore()
\ No newline at end of file
+store = HealthStore()
@@ -9,18 +9,53 @@ These tools encapsulate business logic for:
 - generating health summaries
 
 They operate on the shared HealthStore instance from storage.py.
+All tools are coroutines so ADK can run several of them concurrently
+when the model issues parallel function calls.
 """
 
+import asyncio
+import copy
+from dataclasses import asdict
 from datetime import datetime
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Tuple
 
-from .storage import store
+from .storage import MedicationEntry, SymptomEntry, store
 
 logger = logging.getLogger(__name__)
 
+# (epoch second, datetime, isoformat) for the most recent second seen.
+# Rebound as one tuple so concurrent readers never see a mixed entry.
+_ts_cache: Tuple[int, datetime, str] = (0, datetime.fromtimestamp(0), "")
 
-def log_symptom(symptom_name: str, severity: int, notes: str = "") -> Dict[str, Any]:
+
+# ((store version, date), result) of the last get_health_summary() call
+_summary_cache: Optional[Tuple[Tuple[int, str], Dict[str, Any]]] = None
+
+
+def _tick() -> Tuple[int, datetime, str]:
+    """Return the cache entry for the current second, refreshing it on change."""
+    global _ts_cache
+    entry = _ts_cache
+    sec = int(time.time())
+    if sec != entry[0]:
+        dt = datetime.fromtimestamp(sec)
+        entry = _ts_cache = (sec, dt, dt.isoformat())
+    return entry
+
+
+def _now() -> datetime:
+    """Current time truncated to the second."""
+    return _tick()[1]
+
+
+def _iso_now() -> str:
+    """ISO timestamp for the current second, formatted once per second."""
+    return _tick()[2]
+
+
+async def log_symptom(symptom_name: str, severity: int, notes: str = "") -> Dict[str, Any]:
     """
     Logs a symptom with severity rating.
 
@@ -38,14 +73,14 @@ def log_symptom(symptom_name: str, severity: int, notes: str = "") -> Dict[str,
             "error_message": "Severity must be between 1 and 10",
         }
 
-    data = {
-        "symptom": symptom_name,
-        "severity": severity,
-        "notes": notes,
-        "timestamp": datetime.now().isoformat(),
-    }
+    entry = SymptomEntry(
+        symptom=symptom_name,
+        severity=severity,
+        notes=notes,
+        timestamp=_iso_now(),
+    )
 
-    store.add_symptom(data)
+    await store.add_symptom(entry)
 
     return {
         "status": "success",
@@ -53,7 +88,7 @@ def log_symptom(symptom_name: str, severity: int, notes: str = "") -> Dict[str,
     }
 
 
-def track_medication(
+async def track_medication(
     medication_name: str, dosage: str, time_taken: str = ""
 ) -> Dict[str, Any]:
     """
@@ -64,19 +99,17 @@ def track_medication(
     logger.info("track_medication called: %s, dosage=%s", medication_name, dosage)
 
     if not time_taken:
-        from datetime import datetime as _dt
-
-        time_taken = _dt.now().strftime("%H:%M")
+        time_taken = _now().strftime("%H:%M")
         logger.debug("Auto-filled time: %s", time_taken)
 
-    data = {
-        "medication": medication_name,
-        "dosage": dosage,
-        "time": time_taken,
-        "timestamp": datetime.now().isoformat(),
-    }
+    entry = MedicationEntry(
+        medication=medication_name,
+        dosage=dosage,
+        time=time_taken,
+        timestamp=_iso_now(),
+    )
 
-    store.add_medication(data)
+    await store.add_medication(entry)
 
     return {
         "status": "success",
@@ -84,80 +117,90 @@ def track_medication(
     }
 
 
-def analyze_patterns() -> Dict[str, Any]:
+async def analyze_patterns() -> Dict[str, Any]:
     """
     Analyzes symptom patterns and frequencies.
     """
     logger.info("analyze_patterns called")
 
-    symptoms = store.get_symptoms()
+    rows = await store.get_symptom_patterns()
 
-    if not symptoms:
+    if not rows:
         logger.info("No symptoms available for analysis")
         return {"status": "no_data", "message": "No symptoms logged yet"}
 
-    counts = {}
-    severity_sums = {}
-
-    for s in symptoms:
-        name = s["symptom"]
-        sev = s["severity"]
-        counts[name] = counts.get(name, 0) + 1
-        severity_sums[name] = severity_sums.get(name, 0) + sev
-
-    patterns = []
-    for name, count in counts.items():
-        avg = round(severity_sums[name] / count, 1)
-        patterns.append(
-            {
-                "symptom": name,
-                "count": count,
-                "avg_severity": avg,
-            }
-        )
-
-    patterns.sort(key=lambda x: x["count"], reverse=True)
+    # Counting, summing and ordering happen in one SQLite GROUP BY
+    patterns = [
+        {
+            "symptom": name,
+            "count": count,
+            "avg_severity": round(severity_sum / count, 1),
+        }
+        for name, count, severity_sum in rows
+    ]
 
     logger.info("Analysis complete: %d unique symptoms found", len(patterns))
 
     return {
         "status": "success",
         "patterns": patterns,
-        "total_entries": len(symptoms),
+        "total_entries": sum(p["count"] for p in patterns),
     }
 
 
-def get_health_summary() -> Dict[str, Any]:
+async def get_health_summary() -> Dict[str, Any]:
     """
     Generates comprehensive health summary for doctor visits.
+
+    The result is reused until the store changes (or the date rolls over).
+    Every call returns its own copy, so callers may mutate it freely.
     """
+    global _summary_cache
     logger.info("get_health_summary called")
 
-    symptoms = store.get_symptoms()
-    meds = store.get_medications()
-    patterns = analyze_patterns()
-
-    summary = f"Health Summary - {datetime.now().strftime('%Y-%m-%d')}\n"
-    summary += "=" * 50 + "\n"
-    summary += f"Symptoms logged: {len(symptoms)}\n"
-    summary += f"Medications tracked: {len(meds)}\n"
-
-    if patterns.get("status") == "success":
-        summary += "\nTop symptoms:\n"
-        for p in patterns["patterns"][:3]:
-            summary += (
-                f"  - {p['symptom']}: {p['count']}x "
-                f"(avg severity {p['avg_severity']})\n"
-            )
+    # Read the key before building: a write during the build only makes
+    # this entry stale for the old version, never for the new one
+    key = (store.version, _now().strftime("%Y-%m-%d"))
+    cached = _summary_cache
+    if cached is not None and cached[0] == key:
+        logger.info("Health summary served from cache (version %d)", key[0])
+        return copy.deepcopy(cached[1])
+
+    # Independent reads: gather them instead of awaiting one by one
+    symptom_entries, med_entries, med_count, patterns = await asyncio.gather(
+        store.get_symptoms(),
+        store.get_medications(),
+        store.count_medications(),
+        analyze_patterns(),
+    )
+    symptoms = [asdict(s) for s in symptom_entries]
+    meds = [asdict(m) for m in med_entries]
+
+    # Structured rather than pre-rendered text: ADK serializes it as JSON
+    # and the summary agent formats it for the user
+    summary = {
+        "title": "Health Summary",
+        "date": key[1],
+        # Whole-journal counts, consistent with top_symptoms; the symptoms
+        # and medications lists below are only the most recent entries
+        "symptoms_logged": patterns.get("total_entries", 0),
+        "medications_tracked": med_count,
+        "top_symptoms": (
+            patterns["patterns"][:3] if patterns.get("status") == "success" else []
+        ),
+    }
 
     logger.info("Health summary generated successfully")
 
-    return {
+    result = {
         "status": "success",
         "summary": summary,
         "symptoms": symptoms,
         "medications": meds,
     }
+    # Cache a private snapshot; the caller owns `result`
+    _summary_cache = (key, copy.deepcopy(result))
+    return result
 
 
 __all__ = [